@@ -25,5 +25,5 @@
 __version__ = "0.4.0"
 
 from .core import actions, configurations
-from .sapientino_env import Sapientino
+from .sapientino_env import Sapientino, SapientinoTuple
 from .wrappers import observations
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019-2023 Marco Favorito, Roberto Cipollone, Luca Iocchi
+#
+# ------------------------------
+#
+# This file is part of gym-sapientino.
+#
+# gym-sapientino is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gym-sapientino is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gym-sapientino.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""Encoding and decoding of single discrete observations.
+
+When numba is installed (extra 'numba'), NumPy inputs are processed by
+compiled implementations. numba is imported, and the kernels compiled,
+at the first call with NumPy inputs, so importing gym_sapientino does not
+pay for it. Plain Python sequences always use the pure-Python loops,
+which are faster than converting the sequences to arrays.
+"""
+
+import math
+from functools import lru_cache
+from typing import Callable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+def _encode_py(obs: Union[Sequence[int], np.ndarray], sizes: Sequence[int]) -> int:
+    """Encode one observation (pure-Python implementation)."""
+    result = obs[0]
+    shift = sizes[0]
+    for i in range(1, len(obs)):
+        result += obs[i] * shift
+        shift *= sizes[i]
+
+    return result
+
+
+def _decode_py(obs: int, sizes: Union[Sequence[int], np.ndarray]) -> list[int]:
+    """Decode one observation (pure-Python implementation)."""
+    result = []
+    sizes = sizes[::-1]
+    shift = math.prod(sizes[1:])
+    for size in sizes[1:]:
+        r = obs // shift
+        result.append(r)
+        obs %= shift
+        shift //= size
+
+    result.append(obs)
+    return result[::-1]
+
+
+def _encode_kernel(obs, sizes):  # pragma: no cover
+    """Encode one observation (kernel to compile, on int64 arrays)."""
+    result = 0
+    shift = 1
+    for i in range(obs.shape[0]):
+        result += obs[i] * shift
+        shift *= sizes[i]
+    return result
+
+
+def _decode_kernel(obs, sizes):  # pragma: no cover
+    """Decode one observation (kernel to compile, on int64 arrays)."""
+    result = np.empty(sizes.shape[0], dtype=np.int64)
+    for i in range(sizes.shape[0] - 1):
+        result[i] = obs % sizes[i]
+        obs //= sizes[i]
+    result[-1] = obs
+    return result
+
+
+@lru_cache(maxsize=None)
+def _compiled_kernels() -> Optional[Tuple[Callable, Callable]]:
+    """Compile the encoding and decoding kernels, or None without numba."""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+
+    # explicit signatures compile now, not at the first call of each kernel
+    encode_nb = njit("int64(int64[:], int64[:])", cache=True)(_encode_kernel)
+    decode_nb = njit("int64[:](int64, int64[:])", cache=True)(_decode_kernel)
+    return encode_nb, decode_nb
+
+
+def encode_one(obs: Union[Sequence[int], np.ndarray], sizes: Sequence[int]) -> int:
+    """Encode one observation."""
+    kernels = _compiled_kernels() if isinstance(obs, np.ndarray) else None
+    if kernels is not None:
+        return int(
+            kernels[0](
+                np.asarray(obs, dtype=np.int64), np.asarray(sizes, dtype=np.int64)
+            )
+        )
+    return _encode_py(obs, sizes)
+
+
+def decode_one(obs: int, sizes: Union[Sequence[int], np.ndarray]) -> list[int]:
+    """Decode one observation."""
+    kernels = _compiled_kernels() if isinstance(sizes, np.ndarray) else None
+    if kernels is not None:
+        return kernels[1](obs, np.asarray(sizes, dtype=np.int64)).tolist()
+    return _decode_py(obs, sizes)
@@ -22,7 +22,7 @@
 """Everithing concerning the various action spaces."""
 
 from enum import Enum
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 
 import numpy as np
 
@@ -70,20 +70,7 @@ class GridCommand(Command):
 
     def __str__(self) -> str:
         """Get the string representation."""
-        if self == self.LEFT:
-            return "<"
-        elif self == self.RIGHT:
-            return ">"
-        elif self == self.UP:
-            return "^"
-        elif self == self.DOWN:
-            return "v"
-        elif self == self.BEEP:
-            return "o"
-        elif self == self.NOP:
-            return "_"
-        else:
-            raise ValueError("Shouldn't be here...")
+        return _GRID_COMMAND_SYMBOLS[self]
 
     def step(self, robot: Robot) -> Robot:
         """Move a robot according to the command."""
@@ -112,6 +99,16 @@ class GridCommand(Command):
         return GridCommand.BEEP
 
 
+_GRID_COMMAND_SYMBOLS: Dict[GridCommand, str] = {
+    GridCommand.LEFT: "<",
+    GridCommand.RIGHT: ">",
+    GridCommand.UP: "^",
+    GridCommand.DOWN: "v",
+    GridCommand.BEEP: "o",
+    GridCommand.NOP: "_",
+}
+
+
 class DifferentialGridCommand(Command):
     """Action space to move the agent on a grid.
 
@@ -129,20 +126,7 @@ class DifferentialGridCommand(Command):
 
     def __str__(self) -> str:
         """Get the string representation."""
-        if self == self.LEFT:
-            return "<"
-        elif self == self.RIGHT:
-            return ">"
-        elif self == self.FORWARD:
-            return "^"
-        elif self == self.BACKWARD:
-            return "v"
-        elif self == self.BEEP:
-            return "o"
-        elif self == self.NOP:
-            return "_"
-        else:
-            raise ValueError("Shouldn't be here...")
+        return _DIFFERENTIAL_GRID_COMMAND_SYMBOLS[self]
 
     def step(self, robot: Robot) -> Robot:
         """Move a robot according to the command."""
@@ -184,6 +168,16 @@ class DifferentialGridCommand(Command):
         return DifferentialGridCommand.BEEP
 
 
+_DIFFERENTIAL_GRID_COMMAND_SYMBOLS: Dict[DifferentialGridCommand, str] = {
+    DifferentialGridCommand.LEFT: "<",
+    DifferentialGridCommand.RIGHT: ">",
+    DifferentialGridCommand.FORWARD: "^",
+    DifferentialGridCommand.BACKWARD: "v",
+    DifferentialGridCommand.BEEP: "o",
+    DifferentialGridCommand.NOP: "_",
+}
+
+
 class ContinuousCommand(Command):
     """Action space to move the agent on the plane.
 
@@ -200,21 +194,7 @@ class ContinuousCommand(Command):
 
     def __str__(self) -> str:
         """Get the string representation."""
-        cmd = ContinuousCommand(self.value)
-        if cmd == ContinuousCommand.LEFT:
-            return "<"
-        elif cmd == ContinuousCommand.RIGHT:
-            return ">"
-        elif cmd == ContinuousCommand.FORWARD:
-            return "^"
-        elif cmd == ContinuousCommand.BACKWARD:
-            return "v"
-        elif cmd == ContinuousCommand.BEEP:
-            return "o"
-        elif cmd == ContinuousCommand.NOP:
-            return "_"
-        else:
-            raise ValueError("Shouldn't be here...")
+        return _CONTINUOUS_COMMAND_SYMBOLS[self]
 
     def step(self, robot: Robot) -> Robot:
         """Move a robot according to the command."""
@@ -259,3 +239,13 @@ class ContinuousCommand(Command):
     def beep() -> "ContinuousCommand":
         """Get the "Beep" action."""
         return ContinuousCommand.BEEP
+
+
+_CONTINUOUS_COMMAND_SYMBOLS: Dict[ContinuousCommand, str] = {
+    ContinuousCommand.LEFT: "<",
+    ContinuousCommand.RIGHT: ">",
+    ContinuousCommand.FORWARD: "^",
+    ContinuousCommand.BACKWARD: "v",
+    ContinuousCommand.BEEP: "o",
+    ContinuousCommand.NOP: "_",
+}
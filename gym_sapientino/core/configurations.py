@@ -70,7 +70,7 @@ class SapientinoConfiguration:
 
     # game configurations
     agent_configs: tuple[SapientinoAgentConfiguration, ...]
-    grid_map: str = resources.read_text(assets, DEFAULT_MAP_NAME)
+    grid_map: str = resources.files(assets).joinpath(DEFAULT_MAP_NAME).read_text()
     reward_outside_grid: float = -1.0
     reward_duplicate_beep: float = -1.0
     reward_per_step: float = -0.01
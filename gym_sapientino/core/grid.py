@@ -21,7 +21,7 @@
 #
 
 """Classes to represent a Sapientino map."""
-from typing import Dict, Iterator, List
+from typing import Dict, Iterator, List, Tuple
 
 from gym_sapientino.core.types import Colors, color2int, id2color
 
@@ -29,32 +29,41 @@ from gym_sapientino.core.types import Colors, color2int, id2color
 class Cell:
     """A class to represent a cell on the grid."""
 
+    __slots__ = ("x", "y", "color", "_encoded_color")
+
     def __init__(self, x: int, y: int, color: Colors):
         """Initialize the cell."""
         self.x = x
         self.y = y
         self.color = color
+        self._encoded_color = color2int[color]
 
     @property
     def encoded_color(self) -> int:
         """Encode the color."""
-        return color2int[self.color]
+        return self._encoded_color
 
 
 class SapientinoGrid:
     """The grid of the Sapientino environment."""
 
+    __slots__ = ("cells", "_non_blank_cells", "color_count", "counts", "_zero_row")
+
     def __init__(self, cells: List[List[Cell]]):
         """Initialize the grid."""
         self.cells: List[List[Cell]] = cells
+        self._non_blank_cells: Tuple[Cell, ...] = tuple(
+            c for c in self.iter_cells() if c.color != Colors.BLANK
+        )
         self.color_count: Dict[Colors, int] = {}
-        self.counts: List[List[int]] = []
-        self.reset()
+        self.counts: List[List[int]] = [[0] * self.columns for _ in range(self.rows)]
+        self._zero_row: List[int] = [0] * self.columns
 
     def reset(self):
-        """Reset the state of the grid."""
-        self.color_count: Dict[Colors, int] = {}
-        self.counts = [[0] * self.columns for _ in range(self.rows)]
+        """Reset the state of the grid, zeroing the counters in place."""
+        self.color_count.clear()
+        for row in self.counts:
+            row[:] = self._zero_row
 
     def get_bip_counts(self, c: Cell):
         """Get counts."""
@@ -80,6 +89,11 @@ class SapientinoGrid:
             for j in range(len(self.cells[i])):
                 yield self.cells[i][j]
 
+    @property
+    def non_blank_cells(self) -> Tuple[Cell, ...]:
+        """Get the cells that are not blank (colored cells and walls)."""
+        return self._non_blank_cells
+
 
 def _from_character_to_color(char: str) -> Colors:
     """From character to cell."""
@@ -36,6 +36,8 @@ if TYPE_CHECKING:
 class Robot:
     """A class to represent a robot."""
 
+    __slots__ = ("config", "robot_config", "_id", "x", "y", "velocity", "direction")
+
     def __init__(
         self,
         config: "SapientinoConfiguration",
@@ -21,10 +21,9 @@
 #
 
 """State representiations for different Sapientino game."""
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, List, NamedTuple, Sequence, Tuple
 
 import numpy as np
-from numpy import clip
 
 from gym_sapientino.core.actions import Command
 from gym_sapientino.core.configurations import SapientinoConfiguration
@@ -33,23 +32,29 @@ from gym_sapientino.core.objects import Robot
 from gym_sapientino.core.types import Colors
 
 
+class SapientinoObservation(NamedTuple):
+    """The discrete features of one robot."""
+
+    discrete_x: int
+    discrete_y: int
+    theta: int
+    beep: int
+    color: int
+
+
 class SapientinoState:
     """Abstract class to represent a Sapientino state."""
 
+    __slots__ = ("config", "score", "_grid", "_robots", "_last_commands")
+
     def __init__(self, config: "SapientinoConfiguration"):
         """Initialize the state."""
         self.config = config
-
-        self.score = 0
         self._grid = self.config.grid
-        self._grid.reset()
-        self._robots: List[Robot] = [
-            Robot(config, c.initial_position[0], c.initial_position[1], 0.0, 90.0, i)
-            for i, c in enumerate(self.config.agent_configs)
-        ]
-        self._last_commands: List[Command] = [
-            ac.commands.nop() for ac in self.config.agent_configs
-        ]
+        self.score = 0
+        self._robots: List[Robot] = []
+        self._last_commands: List[Command] = []
+        self.reset_inplace()
 
     @property
     def grid(self) -> SapientinoGrid:
@@ -84,6 +89,18 @@ class SapientinoState:
         """Reset the state."""
         return type(self)(self.config)
 
+    def reset_inplace(self) -> None:
+        """Reset the state, reusing this instance and its grid."""
+        self.score = 0
+        self._grid.reset()
+        self._robots = [
+            Robot(
+                self.config, c.initial_position[0], c.initial_position[1], 0.0, 90.0, i
+            )
+            for i, c in enumerate(self.config.agent_configs)
+        ]
+        self._last_commands = [ac.commands.nop() for ac in self.config.agent_configs]
+
     @property
     def is_finished(self) -> bool:
         """Check whether the game is finished."""
@@ -104,6 +121,7 @@ class SapientinoState:
 
     def to_dict(self) -> Tuple[Dict, ...]:
         """Encode into a dictionary."""
+        cells = self._grid.cells
         return tuple(
             {
                 "discrete_x": round(r.x),
@@ -113,10 +131,24 @@ class SapientinoState:
                 "velocity": np.array((r.velocity,), dtype=np.float32),
                 "theta": r.encoded_theta,
                 "angle": np.array((r.direction.theta,), dtype=np.float32),
-                "beep": int(self.last_commands[i] == self.last_commands[i].beep()),
-                "color": self.current_cells[i].encoded_color,
+                "beep": int(c == c.beep()),
+                "color": cells[r.discrete_y][r.discrete_x].encoded_color,
             }
-            for i, r in enumerate(self.robots)
+            for r, c in zip(self._robots, self._last_commands)
+        )
+
+    def to_namedtuple(self) -> Tuple[SapientinoObservation, ...]:
+        """Encode the discrete features of each robot, without building dicts."""
+        cells = self._grid.cells
+        return tuple(
+            SapientinoObservation(
+                r.discrete_x,
+                r.discrete_y,
+                r.encoded_theta,
+                int(c == c.beep()),
+                cells[r.discrete_y][r.discrete_x].encoded_color,
+            )
+            for r, c in zip(self._robots, self._last_commands)
         )
 
     def _force_border_constraints(self, r: Robot) -> Tuple[float, Robot]:
@@ -124,11 +156,11 @@ class SapientinoState:
         x, y = r.x, r.y
         if not (0 <= r.x < self.config.columns - 1):
             reward += self.config.reward_outside_grid
-            x = int(clip(r.x, 0, self.config.columns - 1))
+            x = int(min(max(r.x, 0), self.config.columns - 1))
             r.velocity = 0.0
         if not (0 <= r.y < self.config.rows - 1):
             reward += self.config.reward_outside_grid
-            y = int(clip(r.y, 0, self.config.rows - 1))
+            y = int(min(max(r.y, 0), self.config.rows - 1))
             r.velocity = 0.0
         return reward, r.move(x, y)
 
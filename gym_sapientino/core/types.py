@@ -21,12 +21,11 @@
 #
 
 """Define basic types."""
+import math
 from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, Tuple
 
-import numpy as np
-
 from gym_sapientino.utils import set_to_zero_if_small
 
 
@@ -34,6 +33,8 @@ from gym_sapientino.utils import set_to_zero_if_small
 class Direction:
     """A class to represent the direction."""
 
+    __slots__ = ("theta",)
+
     theta: float
 
     def rotate(self, delta_theta: float):
@@ -67,9 +68,9 @@ class Direction:
 
     def sincos(self) -> Tuple[float, float]:
         """Return the pair (sin(theta), cos(theta)."""
-        rad_theta = np.deg2rad(self.theta)
-        sin_theta = set_to_zero_if_small(np.sin(rad_theta))
-        cos_theta = set_to_zero_if_small(np.cos(rad_theta))
+        rad_theta = math.radians(self.theta)
+        sin_theta = set_to_zero_if_small(math.sin(rad_theta))
+        cos_theta = set_to_zero_if_small(math.cos(rad_theta))
         return sin_theta, cos_theta
 
 
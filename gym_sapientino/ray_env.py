@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019-2023 Marco Favorito, Roberto Cipollone, Luca Iocchi
+#
+# ------------------------------
+#
+# This file is part of gym-sapientino.
+#
+# gym-sapientino is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gym-sapientino is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gym-sapientino.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""Ray actors to collect Sapientino rollouts on many cores or machines.
+
+This module requires the optional dependency 'ray', installed by the 'ray' extra.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import ray
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "gym_sapientino.ray_env requires 'ray'. "
+        "Install it with 'pip install gym_sapientino[ray]'."
+    ) from e
+
+from gym_sapientino.core.configurations import SapientinoConfiguration
+from gym_sapientino.sapientino_env import Sapientino
+
+StepResult = Tuple[List[Any], np.ndarray, bool, bool]
+
+
+class SapientinoWorker:
+    """A persistent Sapientino environment, stepped on request.
+
+    The configuration and the grid stay resident in the worker: remote
+    calls only carry actions in and per-step results out.
+    Use SapientinoActor to instantiate it as a Ray actor.
+    """
+
+    def __init__(self, configuration: SapientinoConfiguration, **kwargs):
+        """
+        Initialize the worker.
+
+        :param configuration: the configuration object.
+        :param kwargs: other keyword arguments for the environment.
+        """
+        self.env = Sapientino(configuration, **kwargs)
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[Any, dict]:
+        """Reset the environment."""
+        return self.env.reset(seed=seed)
+
+    def step(self, action, n_steps: int = 1) -> StepResult:
+        """
+        Repeat an action for some steps.
+
+        Running several steps per call amortizes the cost of a remote call.
+        The loop stops early when the episode ends.
+
+        :param action: the action to execute at each step.
+        :param n_steps: the number of steps.
+        :return: the observations, the rewards, and whether the episode
+            has terminated or has been truncated.
+        """
+        observations, rewards, terminated, truncated = self.env.step_k(
+            [action] * n_steps
+        )
+        # only the last step can end the episode
+        return observations, rewards, bool(terminated.any()), bool(truncated.any())
+
+    def step_k(self, action, k: int) -> Tuple[Any, float, bool, bool]:
+        """
+        Repeat an action for k steps, returning only the final outcome.
+
+        Unlike step, intermediate observations are not sent back.
+        The loop stops early when the episode ends.
+
+        :param action: the action to execute at each step.
+        :param k: the number of steps.
+        :return: the last observation, the sum of the rewards, and whether
+            the episode has terminated or has been truncated.
+        """
+        observations, rewards, terminated, truncated = self.step(action, k)
+        obs = observations[-1] if observations else None
+        return obs, float(rewards.sum()), terminated, truncated
+
+    def close(self) -> None:
+        """Close the environment."""
+        self.env.close()
+
+
+SapientinoActor = ray.remote(SapientinoWorker)
+
+
+def step_actors(
+    actors: Sequence[Any], actions: Sequence, n_steps: int = 1, summed: bool = False
+) -> list:
+    """
+    Step many actors in parallel and wait for their results.
+
+    :param actors: the SapientinoActor handles.
+    :param actions: one action for each actor.
+    :param n_steps: the number of steps each actor executes.
+    :param summed: if True, call SapientinoWorker.step_k instead of step.
+    :return: the results of SapientinoWorker.step (or step_k),
+        one for each actor.
+    """
+    if len(actors) != len(actions):
+        raise ValueError("Expected one action for each actor.")
+    if summed:
+        return ray.get([a.step_k.remote(x, n_steps) for a, x in zip(actors, actions)])
+    return ray.get([a.step.remote(x, n_steps) for a, x in zip(actors, actions)])
@@ -176,7 +176,7 @@ class PygameRenderer(Renderer):
                 [self.offx + g.columns * self.size_square, oy],
             )
 
-        for cell in g.iter_cells():
+        for cell in g.non_blank_cells:
             self._draw_cell(cell, g.get_bip_counts(cell))
 
     def _draw_cell(self, c: Cell, counts: int) -> None:
@@ -22,14 +22,15 @@
 
 """Sapientino environment with OpenAI Gym interface."""
 
-import random
 import sys
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional
 
+import numpy as np
 from gymnasium import Env, Space
 from gymnasium.spaces import Box, Dict, Discrete, Tuple
 
+from gym_sapientino.core.actions import Command
 from gym_sapientino.core.configurations import SapientinoConfiguration
 from gym_sapientino.core.states import SapientinoState, make_state
 from gym_sapientino.rendering.pygame import PygameRenderer
@@ -65,27 +66,86 @@ class SapientinoBase(Env, ABC):
         self.state = make_state(self.configuration)
         self.viewer = PygameRenderer(self.state) if render_mode else None
         self.action_space = self.configuration.action_space
+        # commands of each robot, keyed by action
+        self._action_tables = tuple(
+            {a: ac.get_action(a) for a in range(ac.action_space.n)}
+            for ac in self.configuration.agent_configs
+        )
+
+    def _get_commands(self, action) -> List[Command]:
+        """Get the command of each robot, as SapientinoConfiguration.get_action."""
+        agent_configs = self.configuration.agent_configs
+        commands = []
+        for table, ac, a in zip(self._action_tables, agent_configs, action):
+            try:
+                commands.append(table[a])
+            except (KeyError, TypeError):
+                # let the command class accept or reject anything else
+                commands.append(ac.get_action(a))
+        return commands
 
     def step(self, action):
         """Execute an action."""
-        command = self.configuration.get_action(action)
+        command = self._get_commands(action)
         reward = self.state.step(command)
         obs = self.observe(self.state)
         is_finished = self.state.is_finished
-        if self.render_mode == "human":
+        if self._render_on_step:
             self.render()
         return obs, reward, is_finished, False, {}
 
+    def step_k(self, actions):
+        """
+        Execute a sequence of actions.
+
+        The loop stops early when the episode ends, so the outputs may be
+        shorter than the input.
+
+        :param actions: a sequence of k actions, e.g. an array of shape
+            (k, nb_robots).
+        :return: the list of observations, and arrays of rewards, terminated
+            and truncated flags, one for each executed step.
+        """
+        k = len(actions)
+        observations = []
+        rewards = np.zeros(k, dtype=np.float32)
+        terminated = np.zeros(k, dtype=bool)
+        truncated = np.zeros(k, dtype=bool)
+        for i in range(k):
+            obs, rewards[i], terminated[i], truncated[i], _ = self.step(actions[i])
+            observations.append(obs)
+            if terminated[i] or truncated[i]:
+                break
+        n = len(observations)
+        return observations, rewards[:n], terminated[:n], truncated[:n]
+
     def reset(self, *, seed=None, options=None):
         """Reset the environment."""
-        if seed:
-            self.rng = random.Random(seed)  # nosec
-        self.state = make_state(self.configuration)
+        super().reset(seed=seed)
+        self.state.reset_inplace()
         if self.viewer is not None:
-            self.viewer.reset(self.state)
+            # the state is reset in place, so the viewer is normally bound to it
+            if self.viewer.state is not self.state:
+                self.viewer.reset(self.state)
             self.render()
         return self.observe(self.state), {}
 
+    @property
+    def rng(self) -> np.random.Generator:
+        """Get the random number generator, seeded on reset."""
+        return self.np_random
+
+    @property
+    def render_mode(self) -> Optional[str]:
+        """Get the render mode."""
+        return self._render_mode
+
+    @render_mode.setter
+    def render_mode(self, render_mode: Optional[str]) -> None:
+        """Set the render mode; in "human" mode, every step is rendered."""
+        self._render_mode = render_mode
+        self._render_on_step = render_mode == "human"
+
     def render(self):
         """Render the environment."""
         if not self.render_mode:
@@ -145,8 +205,6 @@ class Sapientino(SapientinoBase):
         self._discrete_y_space = Discrete(self.configuration.rows)
         self._x_space = Box(0.0, self.configuration.columns, shape=[1])
         self._y_space = Box(0.0, self.configuration.rows, shape=[1])
-        self._velocity_space = lambda m, M: Box(m, M, shape=[1])
-        self._theta_space = lambda n: Discrete(n)
         self._angle_space = Box(0.0, 360.0 - sys.float_info.epsilon, shape=[1])
         self._beep_space = Discrete(2)
         self._color_space = Discrete(self.configuration.nb_colors)
@@ -159,22 +217,54 @@ class Sapientino(SapientinoBase):
                         "discrete_y": self._discrete_y_space,
                         "x": self._x_space,
                         "y": self._y_space,
-                        "velocity": self._velocity_space(
-                            self.configuration.agent_configs[i].min_velocity,
-                            self.configuration.agent_configs[i].max_velocity,
-                        ),
-                        "theta": self._theta_space(
-                            self.configuration.agent_configs[i].angle_parts,
-                        ),
+                        "velocity": Box(ac.min_velocity, ac.max_velocity, shape=[1]),
+                        "theta": Discrete(ac.angle_parts),
                         "angle": self._angle_space,
                         "beep": self._beep_space,
                         "color": self._color_space,
                     }
                 )
-                for i in range(self.configuration.nb_robots)
+                for ac in self.configuration.agent_configs
             ]
         )
 
     def observe(self, state: SapientinoState):
         """Observe the state."""
         return state.to_dict()
+
+
+class SapientinoTuple(SapientinoBase):
+    """A Sapientino environment with the discrete features of each robot.
+
+    Observations are tuples of SapientinoObservation, one for each robot,
+    with fields discrete_x, discrete_y, theta, beep and color.
+    This is a faster alternative to Sapientino when only discrete
+    features are needed.
+    """
+
+    def __init__(
+        self,
+        configuration: Optional[SapientinoConfiguration] = None,
+        **kwargs,
+    ):
+        """Initialize the tuple space."""
+        super().__init__(configuration=configuration, **kwargs)  # type: ignore
+
+        self.observation_space = Tuple(
+            [
+                Tuple(
+                    [
+                        Discrete(self.configuration.columns),
+                        Discrete(self.configuration.rows),
+                        Discrete(ac.angle_parts),
+                        Discrete(2),
+                        Discrete(self.configuration.nb_colors),
+                    ]
+                )
+                for ac in self.configuration.agent_configs
+            ]
+        )
+
+    def observe(self, state: SapientinoState):
+        """Observe the state."""
+        return state.to_namedtuple()
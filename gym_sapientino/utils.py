@@ -21,59 +21,70 @@
 #
 
 """This module contains utility functions."""
-from functools import reduce
+from functools import lru_cache
+from typing import Sequence, Tuple, Union
 
 import numpy as np
 from gymnasium import spaces
 
+from gym_sapientino._fastcodec import decode_one, encode_one
 
-# TODO: maybe prefer numpy functions for encode decode
-def encode(obs: list[int], spaces: list[int]) -> int:
+
+@lru_cache(maxsize=32)
+def _place_values(sizes: Tuple[int, ...]) -> np.ndarray:
+    """Get the multiplier of each component of an encoded observation."""
+    return np.concatenate(([1], np.cumprod(sizes[:-1], dtype=np.int64)))
+
+
+def encode(
+    obs: Union[Sequence[int], np.ndarray], spaces: Sequence[int]
+) -> Union[int, np.ndarray]:
     """
     Encode an observation from a list of gym.Discrete spaces in one number.
 
+    A 2-D array of observations, one for each row, is encoded in one pass
+    and gives an array of numbers.
+
     :param obs: an observation belonging to the state space (a list of gym.Discrete spaces)
     :param spaces: the list of gym.Discrete spaces from where the observation is observed.
     :return: the encoded observation.
     """
-    if len(obs) != len(spaces):
+    if not isinstance(obs, np.ndarray) or obs.ndim == 1:
+        if len(obs) != len(spaces):
+            raise ValueError("Wrong input length")
+        return encode_one(obs, spaces)
+    if obs.shape[-1] != len(spaces):
         raise ValueError("Wrong input length")
-    sizes = spaces
-    result = obs[0]
-    shift = sizes[0]
-    for o, size in list(zip(obs, sizes))[1:]:
-        result += o * shift
-        shift *= size
-
-    return result
+    return obs.astype(np.int64) @ _place_values(tuple(spaces))
 
 
-def decode(obs: int, spaces: list[int]) -> list[int]:
+def decode(
+    obs: Union[int, np.ndarray], spaces: Sequence[int]
+) -> Union[list[int], np.ndarray]:
     """
     Decode an observation from a list of gym.Discrete spaces in a list of integers.
 
     It assumes that obs has been encoded by using the 'utils.encode' function.
+    An array of encoded observations gives an array with one decoded
+    observation for each row.
 
     :param obs: the encoded observation
     :param spaces: the list of gym.Discrete spaces from where the observation is observed.
     :return: the decoded observation.
     """
-    result = []
-    sizes = spaces[::-1]
-    shift = reduce(lambda x, y: x * y, sizes) // sizes[0]
-    for size in sizes[1:]:
-        r = obs // shift
-        result.append(r)
-        obs %= shift
-        shift //= size
-
-    result.append(obs)
-    return result[::-1]
+    if not isinstance(obs, np.ndarray) or obs.ndim == 0:
+        return decode_one(int(obs), spaces)
+    result = obs.astype(np.int64)[..., np.newaxis] // _place_values(tuple(spaces))
+    result[..., :-1] %= np.asarray(spaces[:-1], dtype=np.int64)
+    return result
 
 
 def set_to_zero_if_small(x) -> float:
-    """Set to zero if it is a small number."""
-    return 0.0 if np.isclose(x, 0.0) else x
+    """Set to zero if it is a small number.
+
+    Same as np.isclose(x, 0.0), whose tolerance is 1e-8, for scalars.
+    """
+    return 0.0 if abs(x) <= 1e-8 else x
 
 
 def combine_boxes(*boxes: spaces.Box) -> spaces.Box:
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019-2023 Marco Favorito, Roberto Cipollone, Luca Iocchi
+#
+# ------------------------------
+#
+# This file is part of gym-sapientino.
+#
+# gym-sapientino is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gym-sapientino is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gym-sapientino.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""A vectorized Sapientino environment.
+
+The state of all the environments is stored in NumPy arrays, with one row
+per environment and one column per robot, so that a step advances all the
+environments with a few array operations.
+"""
+from typing import Any, Callable, Dict, List, Mapping, Optional, Type, Union
+
+import numpy as np
+from gymnasium.vector import VectorEnv
+
+from gym_sapientino.core.actions import (
+    Command,
+    ContinuousCommand,
+    DifferentialGridCommand,
+    GridCommand,
+)
+from gym_sapientino.core.configurations import SapientinoConfiguration
+from gym_sapientino.core.objects import Robot
+from gym_sapientino.core.types import Colors
+from gym_sapientino.sapientino_env import Sapientino
+
+
+def _action_table(commands: Type[Command], values: Mapping[Any, float]) -> np.ndarray:
+    """Map each action of a command class to a value (zero if missing)."""
+    return np.array([values.get(commands(a), 0.0) for a in range(len(commands))])
+
+
+_GRID_DX = _action_table(GridCommand, {GridCommand.LEFT: -1, GridCommand.RIGHT: 1})
+_GRID_DY = _action_table(GridCommand, {GridCommand.UP: -1, GridCommand.DOWN: 1})
+_DIFFERENTIAL_ROTATION = _action_table(
+    DifferentialGridCommand,
+    {DifferentialGridCommand.LEFT: 90.0, DifferentialGridCommand.RIGHT: -90.0},
+)
+_DIFFERENTIAL_MOTION = _action_table(
+    DifferentialGridCommand,
+    {DifferentialGridCommand.FORWARD: 1, DifferentialGridCommand.BACKWARD: -1},
+)
+_CONTINUOUS_ROTATION = _action_table(
+    ContinuousCommand, {ContinuousCommand.LEFT: 1, ContinuousCommand.RIGHT: -1}
+)
+_CONTINUOUS_ACCELERATION = _action_table(
+    ContinuousCommand, {ContinuousCommand.FORWARD: 1, ContinuousCommand.BACKWARD: -1}
+)
+
+
+def _rotate(theta: np.ndarray, delta_theta: np.ndarray) -> np.ndarray:
+    """Rotate angles, as Direction.rotate."""
+    th = theta + delta_theta
+    return np.where(th < 0, 360.0 + th, np.where(th >= 360.0, th % 360.0, th))
+
+
+def _set_to_zero_if_small(x: np.ndarray) -> np.ndarray:
+    """Set to zero the small numbers, as utils.set_to_zero_if_small."""
+    return np.where(np.abs(x) <= 1e-8, 0.0, x)
+
+
+class VectorSapientino(VectorEnv):
+    """Many Sapientino environments with the same configuration, stepped together.
+
+    Observations and actions are batched as in gymnasium.vector. For each
+    robot, an action is an array with one entry per environment, and an
+    observation is a dictionary of arrays with one entry per environment.
+
+    The commands of the core.actions module are vectorized. Robots with other
+    commands are moved one environment at a time through Command.step.
+    As in Sapientino, episodes never terminate. Rendering is not supported.
+    """
+
+    def __init__(self, configuration: SapientinoConfiguration, num_envs: int):
+        """
+        Initialize the environments.
+
+        :param configuration: the configuration of all the environments.
+        :param num_envs: the number of environments.
+        """
+        single_env = Sapientino(configuration)
+        super().__init__(
+            num_envs, single_env.observation_space, single_env.action_space
+        )
+        self.configuration = configuration
+
+        cells = configuration.grid.cells
+        self._walls = np.array([[c.color == Colors.WALL for c in row] for row in cells])
+        self._colors = np.array([[c.encoded_color for c in row] for row in cells])
+        self._step_robot: List[Callable[[int, np.ndarray], None]] = [
+            {
+                GridCommand: self._step_grid,
+                DifferentialGridCommand: self._step_differential,
+                ContinuousCommand: self._step_continuous,
+            }.get(ac.commands, self._step_generic)
+            for ac in configuration.agent_configs
+        ]
+
+        shape = (num_envs, configuration.nb_robots)
+        self.x = np.zeros(shape)
+        self.y = np.zeros(shape)
+        self.velocity = np.zeros(shape)
+        self.theta = np.zeros(shape)
+        self.beep = np.zeros(shape, dtype=bool)
+        self.counts = np.zeros(
+            (num_envs, configuration.rows, configuration.columns), dtype=np.int64
+        )
+        self._actions: List[np.ndarray] = []
+
+    def reset_wait(
+        self,
+        seed: Optional[Union[int, List[int]]] = None,
+        options: Optional[dict] = None,
+    ):
+        """Reset all the environments.
+
+        The initial state is deterministic, so the seed is not used.
+        """
+        for i, ac in enumerate(self.configuration.agent_configs):
+            self.x[:, i], self.y[:, i] = ac.initial_position
+        self.velocity[:] = 0.0
+        self.theta[:] = 90.0
+        self.beep[:] = False
+        self.counts[:] = 0
+        return self._observe(), {}
+
+    def step_async(self, actions):
+        """Store the actions: one array of actions for each robot."""
+        self._actions = [np.asarray(a, dtype=np.int64) for a in actions]
+
+    def step_wait(self, **kwargs):
+        """Execute the stored actions in all the environments."""
+        config = self.configuration
+        for i, actions in enumerate(self._actions):
+            self._step_robot[i](i, actions)
+
+        rewards = np.zeros(self.num_envs)
+        envs = np.arange(self.num_envs)
+        for i, actions in enumerate(self._actions):
+            # Border constraints
+            x, y = self.x[:, i], self.y[:, i]
+            outside_x = ~((0 <= x) & (x < config.columns - 1))
+            outside_y = ~((0 <= y) & (y < config.rows - 1))
+            x[outside_x] = np.trunc(np.clip(x[outside_x], 0, config.columns - 1))
+            y[outside_y] = np.trunc(np.clip(y[outside_y], 0, config.rows - 1))
+            self.velocity[outside_x | outside_y, i] = 0.0
+            rewards += np.where(outside_x, config.reward_outside_grid, 0.0) + np.where(
+                outside_y, config.reward_outside_grid, 0.0
+            )
+
+            # Beeps
+            beep_value = config.agent_configs[i].commands.beep().value
+            self.beep[:, i] = actions == beep_value
+            beeping = envs[self.beep[:, i]]
+            cell_x, cell_y = self._discrete(i)
+            self.counts[beeping, cell_y[beeping], cell_x[beeping]] += 1
+            duplicate = self.beep[:, i] & (self.counts[envs, cell_y, cell_x] >= 2)
+            rewards += np.where(duplicate, config.reward_duplicate_beep, 0.0)
+
+        rewards += config.reward_per_step
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        return self._observe(), rewards, terminated, truncated, {}
+
+    def _discrete(self, i: int):
+        """Get the discrete coordinates of a robot, as Robot.discrete_x/y."""
+        x = np.minimum(
+            np.round(self.x[:, i]).astype(np.int64), self.configuration.columns - 1
+        )
+        y = np.minimum(
+            np.round(self.y[:, i]).astype(np.int64), self.configuration.rows - 1
+        )
+        return x, y
+
+    def _on_wall(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Check which coordinates are walls or outside the map, as Robot._on_wall."""
+        columns, rows = self.configuration.columns, self.configuration.rows
+        x = np.minimum(np.round(x).astype(np.int64), columns - 1)
+        y = np.minimum(np.round(y).astype(np.int64), rows - 1)
+        result = (x < 0) | (y < 0)
+        inside = ~result
+        result[inside] = self._walls[y[inside], x[inside]]
+        return result
+
+    def _step_grid(self, i: int, actions: np.ndarray) -> None:
+        """Move a robot with GridCommand actions."""
+        x = self.x[:, i] + _GRID_DX[actions]
+        y = self.y[:, i] + _GRID_DY[actions]
+        moved = ~self._on_wall(x, y)
+        self.x[moved, i] = x[moved]
+        self.y[moved, i] = y[moved]
+
+    def _step_differential(self, i: int, actions: np.ndarray) -> None:
+        """Move a robot with DifferentialGridCommand actions."""
+        theta = self.theta[:, i]
+        dx = np.where(theta == 0, 1, np.where(theta == 180, -1, 0))
+        dy = np.where(theta == 90, -1, np.where(theta == 270, 1, 0))
+        motion = _DIFFERENTIAL_MOTION[actions]
+        x = self.x[:, i] + motion * dx
+        y = self.y[:, i] + motion * dy
+        theta = _rotate(theta, _DIFFERENTIAL_ROTATION[actions])
+        moved = ~self._on_wall(x, y)
+        self.x[moved, i] = x[moved]
+        self.y[moved, i] = y[moved]
+        self.theta[moved, i] = theta[moved]
+
+    def _step_continuous(self, i: int, actions: np.ndarray) -> None:
+        """Move a robot with ContinuousCommand actions."""
+        agent_config = self.configuration.agent_configs[i]
+        theta = _rotate(
+            self.theta[:, i], _CONTINUOUS_ROTATION[actions] * agent_config.angular_speed
+        )
+        acceleration = _CONTINUOUS_ACCELERATION[actions]
+        velocity = self.velocity[:, i] + acceleration * agent_config.acceleration
+        velocity = np.where(
+            acceleration != 0, _set_to_zero_if_small(velocity), self.velocity[:, i]
+        )
+        velocity = np.clip(
+            velocity, agent_config.min_velocity, agent_config.max_velocity
+        )
+
+        rad_theta = np.deg2rad(theta)
+        sin = _set_to_zero_if_small(np.sin(rad_theta))
+        cos = _set_to_zero_if_small(np.cos(rad_theta))
+        x = self.x[:, i] + velocity * cos
+        y = self.y[:, i] + -velocity * sin
+        moved = ~self._on_wall(x, y)
+
+        self.x[moved, i] = x[moved]
+        self.y[moved, i] = y[moved]
+        self.velocity[:, i] = np.where(moved, velocity, 0.0)
+        self.theta[:, i] = theta
+
+    def _step_generic(self, i: int, actions: np.ndarray) -> None:
+        """Move a robot with any command, one environment at a time."""
+        commands = self.configuration.agent_configs[i].commands
+        for env in range(self.num_envs):
+            robot = Robot(
+                self.configuration,
+                float(self.x[env, i]),
+                float(self.y[env, i]),
+                float(self.velocity[env, i]),
+                float(self.theta[env, i]),
+                i,
+            )
+            robot = commands(int(actions[env])).step(robot)
+            self.x[env, i], self.y[env, i] = robot.x, robot.y
+            self.velocity[env, i] = robot.velocity
+            self.theta[env, i] = robot.direction.theta
+
+    def _observe(self) -> tuple:
+        """Get the batched observations, as SapientinoState.to_dict."""
+        observations: List[Dict[str, np.ndarray]] = []
+        for i, ac in enumerate(self.configuration.agent_configs):
+            cell_x, cell_y = self._discrete(i)
+            observations.append(
+                {
+                    "discrete_x": np.round(self.x[:, i]).astype(np.int64),
+                    "discrete_y": np.round(self.y[:, i]).astype(np.int64),
+                    "x": self.x[:, i, np.newaxis].astype(np.float32),
+                    "y": self.y[:, i, np.newaxis].astype(np.float32),
+                    "velocity": self.velocity[:, i, np.newaxis].astype(np.float32),
+                    "theta": (self.theta[:, i] / (360 / ac.angle_parts)).astype(
+                        np.int64
+                    ),
+                    "angle": self.theta[:, i, np.newaxis].astype(np.float32),
+                    "beep": self.beep[:, i].astype(np.int64),
+                    "color": self._colors[cell_y, cell_x],
+                }
+            )
+        return tuple(observations)
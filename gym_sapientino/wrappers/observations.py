@@ -27,8 +27,9 @@ The features classes in this module define a specific observation
 space and extract information accordingly.
 """
 
+import math
 from abc import ABC, abstractmethod
-from typing import Any, Sequence, Type, cast
+from typing import Any, Optional, Sequence, Type, cast
 
 import numpy as np
 from gymnasium import ObservationWrapper, Space, spaces
@@ -37,6 +38,24 @@ from gym_sapientino import Sapientino, utils
 
 DictObs = dict[str, Any]
 
+_DEG2RAD = math.pi / 180.0
+
+
+def _read_only_array(
+    arrays: dict[tuple, np.ndarray], key: tuple, dtype: Optional[np.dtype]
+) -> np.ndarray:
+    """Get a read-only array of the key values, built at the first request.
+
+    Discrete features take few distinct values, so the same array objects
+    are returned again and again instead of allocating new ones.
+    """
+    array = arrays.get(key)
+    if array is None:
+        array = np.array(key, dtype=dtype)
+        array.setflags(write=False)
+        arrays[key] = array
+    return array
+
 
 class Features(ABC):
     """Base class for all observation spaces.
@@ -66,6 +85,10 @@ class Features(ABC):
         """Transform according to observation space."""
         pass
 
+    def discrete_sizes(self, *keys: str) -> list[int]:
+        """Get the sizes of the Discrete input spaces with the given keys."""
+        return [int(cast(spaces.Discrete, self.dict_space[key]).n) for key in keys]
+
 
 class UseFeatures(ObservationWrapper):
     """Choose a set of features for each robot in the environment.
@@ -95,20 +118,22 @@ class UseFeatures(ObservationWrapper):
 
         # Obs space
         self.observation_space = spaces.Tuple(
-            [self.features[i].compute_space() for i in range(len(features))]
+            [f.observation_space for f in self.features]
         )
+        self._computes = tuple(f.compute_observation for f in self.features)
+        # With one robot, the usual case, skip the loop in observation
+        self._single_compute = self._computes[0] if len(self._computes) == 1 else None
 
     def observation(self, observation):
         """Compute an observation with features."""
-        if len(observation) != len(self.features):
+        if len(observation) != len(self._computes):
             raise RuntimeError(
-                "Wrong observation length. Expected " + str(len(self.features))
+                "Wrong observation length. Expected " + str(len(self._computes))
             )
-        self.last_dict_observation = cast(Sequence[Any], observation)
-        return [
-            self.features[i].compute_observation(observation[i])
-            for i in range(len(observation))
-        ]
+        self.last_dict_observation = observation
+        if self._single_compute is not None:
+            return (self._single_compute(observation[0]),)
+        return tuple([compute(o) for compute, o in zip(self._computes, observation)])
 
 
 class DiscreteFeatures(Features):
@@ -117,26 +142,25 @@ class DiscreteFeatures(Features):
     Discrete positions on the grid.
     """
 
+    def __init__(self, dict_space: spaces.Dict):
+        """Initialize."""
+        super().__init__(dict_space)
+        self._arrays: dict[tuple, np.ndarray] = {}
+
     def compute_space(self) -> spaces.MultiDiscrete:
         """Compute observation space."""
-        x_space = cast(spaces.Discrete, self.dict_space.spaces["discrete_x"])
-        y_space = cast(spaces.Discrete, self.dict_space.spaces["discrete_y"])
-        beep_space = cast(spaces.Discrete, self.dict_space.spaces["beep"])
         return spaces.MultiDiscrete(
-            [x_space.n.item(), y_space.n.item(), beep_space.n.item()]
+            self.discrete_sizes("discrete_x", "discrete_y", "beep")
         )
 
     def compute_observation(self, observation: DictObs):
         """Transform according to observation space."""
-        new_state = np.array(
-            [
-                observation["discrete_x"],
-                observation["discrete_y"],
-                observation["beep"],
-            ],
-            dtype=int,
+        key = (
+            observation["discrete_x"],
+            observation["discrete_y"],
+            observation["beep"],
         )
-        return new_state
+        return _read_only_array(self._arrays, key, self.observation_space.dtype)
 
 
 class DiscreteAngleFeatures(Features):
@@ -145,44 +169,49 @@ class DiscreteAngleFeatures(Features):
     Discrete positions on the grid and discrete orientation.
     """
 
+    def __init__(self, dict_space: spaces.Dict):
+        """Initialize."""
+        super().__init__(dict_space)
+        self._arrays: dict[tuple, np.ndarray] = {}
+
     def compute_space(self) -> spaces.MultiDiscrete:
         """Compute observation space."""
-        x_space = cast(spaces.Discrete, self.dict_space.spaces["discrete_x"])
-        y_space = cast(spaces.Discrete, self.dict_space.spaces["discrete_y"])
-        theta_space = cast(spaces.Discrete, self.dict_space.spaces["theta"])
-        beep_space = cast(spaces.Discrete, self.dict_space.spaces["beep"])
         return spaces.MultiDiscrete(
-            [
-                x_space.n.item(),
-                y_space.n.item(),
-                theta_space.n.item(),
-                beep_space.n.item(),
-            ]
+            self.discrete_sizes("discrete_x", "discrete_y", "theta", "beep")
         )
 
     def compute_observation(self, observation: DictObs):
         """Transform according to observation space."""
-        new_state = np.array(
-            [
-                observation["discrete_x"],
-                observation["discrete_y"],
-                observation["theta"],
-                observation["beep"],
-            ],
-            dtype=int,
+        key = (
+            observation["discrete_x"],
+            observation["discrete_y"],
+            observation["theta"],
+            observation["beep"],
         )
-        return new_state
+        return _read_only_array(self._arrays, key, self.observation_space.dtype)
 
 
 class ContinuousFeatures(Features):
     """Continuous features with orientation on the plane."""
 
+    # Bounds of the computed spaces, by bounds of the x and y input spaces
+    _bounds_cache: dict[tuple, tuple[np.ndarray, np.ndarray]] = {}
+
     def compute_space(self) -> spaces.Box:
         """Compute observation space."""
         # Position on plane
         x_space = cast(spaces.Box, self.dict_space.spaces["x"])
         y_space = cast(spaces.Box, self.dict_space.spaces["y"])
 
+        # Environments with the same map share the bounds, not the space
+        key = tuple(
+            tuple(bound.flat)
+            for bound in (x_space.low, x_space.high, y_space.low, y_space.high)
+        )
+        bounds = self._bounds_cache.get(key)
+        if bounds is not None:
+            return spaces.Box(*bounds)
+
         # Try with cos, sin, instead of angle
         cos_space = spaces.Box(-1, 1, shape=[1])
         sin_space = spaces.Box(-1, 1, shape=[1])
@@ -204,24 +233,56 @@ class ContinuousFeatures(Features):
             dy_space,
             beep_space,
         )
+        self._bounds_cache[key] = (merged.low.copy(), merged.high.copy())
         return merged
 
     def compute_observation(self, observation: DictObs):
         """Transform according to observation space."""
         # Deg to radians
-        cos = np.reshape(np.cos(observation["angle"] / 180 * np.pi), [1])
-        sin = np.reshape(np.sin(observation["angle"] / 180 * np.pi), [1])
+        angle = float(observation["angle"][0]) * _DEG2RAD
+        cos = math.cos(angle)
+        sin = math.sin(angle)
+        velocity = float(observation["velocity"][0])
 
-        new_state = np.concatenate(
+        new_state = np.array(
             [
-                observation["x"],
-                observation["y"],
+                observation["x"][0],
+                observation["y"][0],
                 cos,
                 sin,
-                observation["velocity"] * cos,
-                observation["velocity"] * sin,
-                np.reshape(observation["beep"], [1]),
+                velocity * cos,
+                velocity * sin,
+                observation["beep"],
             ],
             dtype=np.float32,
         )
         return new_state
+
+
+class PackedFeatures(Features):
+    """Discrete features packed into a single integer.
+
+    Positions, orientation, beep and color are stored in consecutive
+    bit fields, each as wide as needed for its discrete space, as in
+    x | y << s1 | theta << s2 | beep << s3 | color << s4.
+    Useful as a key for tabular methods.
+    """
+
+    fields = ("discrete_x", "discrete_y", "theta", "beep", "color")
+
+    def compute_space(self) -> spaces.Discrete:
+        """Compute observation space."""
+        shifts = []
+        total_bits = 0
+        for n in self.discrete_sizes(*self.fields):
+            shifts.append(total_bits)
+            total_bits += (n - 1).bit_length()
+        self._shifts = tuple(zip(self.fields, shifts))
+        return spaces.Discrete(2**total_bits)
+
+    def compute_observation(self, observation: DictObs) -> int:
+        """Transform according to observation space."""
+        packed = 0
+        for field, shift in self._shifts:
+            packed |= int(observation[field]) << shift
+        return packed
@@ -16,3 +16,12 @@ _.last_dict_observation  # unused attribute (/home/roberto/repos/gym-sapientino/
 DiscreteFeatures  # unused class (/home/roberto/repos/gym-sapientino/gym_sapientino/wrappers/observations.py:114)
 DiscreteAngleFeatures  # unused class (/home/roberto/repos/gym-sapientino/gym_sapientino/wrappers/observations.py:142)
 ContinuousFeatures  # unused class (/home/roberto/repos/gym-sapientino/gym_sapientino/wrappers/observations.py:177)
+SapientinoActor  # unused variable (gym_sapientino/ray_env.py:94)
+step_actors  # unused function (gym_sapientino/ray_env.py:97)
+VectorSapientino  # unused class (gym_sapientino/vector_env.py:81)
+reset_wait  # unused method (gym_sapientino/vector_env.py:129)
+step_async  # unused method (gym_sapientino/vector_env.py:146)
+step_wait  # unused method (gym_sapientino/vector_env.py:150)
+PackedFeatures  # unused class (gym_sapientino/wrappers/observations.py:230)
+SapientinoTuple  # unused class (gym_sapientino/sapientino_env.py:198)
+_.current_cells  # unused property (gym_sapientino/core/states.py:109)
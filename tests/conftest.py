@@ -21,8 +21,28 @@
 #
 
 """Conftest module."""
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+# Keep numba's compiled codec between runs, out of the source tree.
+# This must be set before gym_sapientino is imported.
+os.environ.setdefault(
+    "NUMBA_CACHE_DIR", str(Path(__file__).parent.parent / ".pytest_cache" / "numba")
+)
 
 
 def pytest_addoption(parser):
     """Add options to pytest parser."""
     parser.addoption("--ci", action="store_true", default=False, help="Run on CI.")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def with_rendering(request):
+    """Return true if not on CI - Pygame rendering not supported."""
+    result = not request.config.getoption("--ci")
+    if not result:
+        logging.info("Skipping rendering, because executing the test on CI.")
+    return result
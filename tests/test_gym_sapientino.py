@@ -21,7 +21,14 @@
 #
 
 """Tests for the Sapientino Gym environment."""
+
+import functools
+import itertools
 import logging
+import pickle  # nosec
+import subprocess  # nosec
+import sys
+import time
 from importlib import resources
 from typing import Tuple, cast
 
@@ -31,7 +38,7 @@ import pytest
 from gymnasium import spaces
 
 import gym_sapientino.assets
-from gym_sapientino import Sapientino, __version__
+from gym_sapientino import Sapientino, SapientinoTuple, __version__, utils
 from gym_sapientino.core import actions
 from gym_sapientino.core.actions import Command
 from gym_sapientino.core.configurations import (
@@ -39,12 +46,12 @@ from gym_sapientino.core.configurations import (
     SapientinoConfiguration,
 )
 from gym_sapientino.core.objects import Robot
+from gym_sapientino.vector_env import VectorSapientino
 from gym_sapientino.wrappers import observations
 from gym_sapientino.wrappers.gym import SingleAgentWrapper
 
 NB_ROLLOUT_STEPS = 20
 
-map_str = resources.read_text(gym_sapientino.assets, "map1.txt")
 rendering = False  # NOTE: enable this to see agents move
 
 
@@ -53,6 +60,12 @@ def test_version():
     assert __version__ == "0.4.0"
 
 
+@functools.lru_cache(maxsize=None)
+def _load_map() -> str:
+    """Read the test map, once and only when a test needs it."""
+    return resources.files(gym_sapientino.assets).joinpath("map1.txt").read_text()
+
+
 def sapientino_dict(
     agents_conf: Tuple[SapientinoAgentConfiguration, ...],
     **kwargs,
@@ -60,7 +73,7 @@ def sapientino_dict(
     """Create a sapientino instance from agents configurations."""
     conf = SapientinoConfiguration(
         agents_conf,
-        grid_map=map_str,
+        grid_map=_load_map(),
         reward_per_step=0.0,
         reward_outside_grid=0.0,
         reward_duplicate_beep=0.0,
@@ -69,17 +82,10 @@ def sapientino_dict(
     return env
 
 
-@pytest.fixture(autouse=True, scope="session")
-def with_rendering(request):
-    """Return true if not on CI - Pygame rendering not supported."""
-    result = not request.config.getoption("--ci")
-    if not result:
-        logging.info("Skipping rendering, because executing the test on CI.")
-    return result
-
-
 def test_rendering_rollout(with_rendering):
     """Test rendering of the environment (if allowed)."""
+    if not with_rendering:
+        pytest.skip("Pygame rendering not supported on CI.")
     agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
     env = sapientino_dict((agent_conf,), render_mode="rgb_array")
 
@@ -92,94 +98,269 @@ def test_rendering_rollout(with_rendering):
     env.close()
 
 
-def rollout(env: gym.Env):
+def _rollout_fast(env: gym.Env):
     """Perform rollout."""
     observation_space = cast(gym.Space, env.observation_space)
     logging.debug(observation_space)
+    # Seeded, so that a failing rollout can be reproduced
+    action_space = cast(gym.Space, env.action_space)
+    action_space.seed(0)
+    sample = action_space.sample
     env.reset()
     for _ in range(NB_ROLLOUT_STEPS):
-        action = cast(gym.Space, env.action_space).sample()
+        action = sample()
         ret = env.step(action)
         logging.debug(ret)
         assert observation_space.contains(ret[0])
+        # Vector envs reset on their own
+        if not isinstance(env, gym.vector.VectorEnv) and (ret[2] or ret[3]):
+            obs, _ = env.reset()
+            assert observation_space.contains(obs)
 
 
-def test_one():
-    """Tests the initialization with one agent."""
-    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
-    env = sapientino_dict((agent_conf,))
+class _PauseAfterStep(gym.Wrapper):
+    """Pause after each step, so that a rendered rollout can be followed."""
+
+    def step(self, action):
+        """Do a step and wait."""
+        ret = super().step(action)
+        time.sleep(0.2)
+        return ret
+
+
+def _rollout_render(env: gym.Env):
+    """Perform rollout, showing each step in a window."""
+    if isinstance(env, gym.vector.VectorEnv):
+        return _rollout_fast(env)
+    render_mode = env.unwrapped.render_mode
+    env.unwrapped.render_mode = "human"
+    _rollout_fast(_PauseAfterStep(env))
+    env.close()
+    env.unwrapped.render_mode = render_mode
+
+
+rollout = _rollout_render if rendering else _rollout_fast
+
+
+# Agents of the environments tested by test_rollout, by test id
+ROLLOUT_CASES = {
+    "one": (SapientinoAgentConfiguration(initial_position=(3, 3)),),
+    "two": (
+        SapientinoAgentConfiguration(initial_position=(3, 3)),
+        SapientinoAgentConfiguration(initial_position=(3, 4)),
+    ),
+    "differential": (
+        SapientinoAgentConfiguration(
+            initial_position=(3, 3),
+            commands=actions.DifferentialGridCommand,
+        ),
+    ),
+    "continuous": (
+        SapientinoAgentConfiguration(
+            initial_position=(3, 3),
+            commands=actions.ContinuousCommand,
+        ),
+    ),
+    "different_action_spaces": (
+        SapientinoAgentConfiguration(
+            initial_position=(3, 3),
+            commands=actions.GridCommand,
+        ),
+        SapientinoAgentConfiguration(
+            initial_position=(3, 4),
+            commands=actions.DifferentialGridCommand,
+        ),
+        SapientinoAgentConfiguration(
+            initial_position=(3, 2),
+            commands=actions.ContinuousCommand,
+        ),
+    ),
+}
+
+
+@pytest.mark.parametrize(
+    "agents_conf", ROLLOUT_CASES.values(), ids=ROLLOUT_CASES.keys()
+)
+def test_rollout(agents_conf):
+    """Test a rollout with the given agents."""
+    env = sapientino_dict(agents_conf)
     rollout(env)
 
 
-def test_two():
-    """Test with two agents."""
+def test_observation_space():
+    """Test that the observation space describes observations, not actions."""
     agents_conf = (
         SapientinoAgentConfiguration(initial_position=(3, 3)),
         SapientinoAgentConfiguration(initial_position=(3, 4)),
     )
     env = sapientino_dict(agents_conf)
-    rollout(env)
+    assert isinstance(env.observation_space, spaces.Tuple)
+    assert len(env.observation_space) == len(agents_conf)
+    assert all(isinstance(s, spaces.Dict) for s in env.observation_space)
+    assert env.observation_space != env.action_space
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
 
 
-def test_single_agent():
-    """Test a simplified observation space for one agent only."""
-    env = sapientino_dict(
-        agents_conf=(SapientinoAgentConfiguration(initial_position=(3, 3)),)
-    )
-    env = SingleAgentWrapper(env)
-    assert isinstance(env.action_space, spaces.Discrete)
-    assert isinstance(env.observation_space, spaces.Dict)
-    rollout(env)
+def test_pickle():
+    """Test that the environment can be pickled, e.g. to send it to workers."""
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    env = sapientino_dict((agent_conf,))
+    env.reset()
+    env.step((1,))
+    copy = pickle.loads(pickle.dumps(env))  # nosec
+    assert copy.observation_space == env.observation_space
+    assert copy.state.robots[0].position == env.state.robots[0].position
+    rollout(copy)
 
 
-def test_discrete_default():
-    """Test the discrete action space (default)."""
+def test_reset_in_place():
+    """Test that reset reuses the state and zeroes the beep counters."""
     agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
-    env = sapientino_dict(agents_conf=(agent_conf,))
-    assert agent_conf.commands == actions.GridCommand, "Wrong default"
+    env = sapientino_dict((agent_conf,))
+    env.reset()
+    state, counts = env.state, env.state.grid.counts
     rollout(env)
+    env.reset()
+    assert env.state is state
+    assert env.state.grid.counts is counts
+    assert not any(any(row) for row in counts)
+    assert env.state.score == 0
+    assert env.state.robots[0].position == (3, 3)
 
 
-def test_discrete_differential():
-    """Test the differential command action space."""
-    agent_conf = SapientinoAgentConfiguration(
-        initial_position=(3, 3),
-        commands=actions.DifferentialGridCommand,
-    )
-    env = sapientino_dict(agents_conf=(agent_conf,))
-    rollout(env)
+def test_info_is_mutable():
+    """Test that each step returns its own info dict, which wrappers can update."""
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    env = sapientino_dict((agent_conf,))
+    env = gym.wrappers.RecordEpisodeStatistics(gym.wrappers.TimeLimit(env, 3))
+    env.reset()
+    infos = [env.step((0,))[4] for _ in range(3)]
+    assert "episode" in infos[-1]
+    assert all("episode" not in info for info in infos[:-1])
 
 
-def test_continuous():
-    """Test continuous motions."""
-    agent_conf = SapientinoAgentConfiguration(
-        initial_position=(3, 3),
-        commands=actions.ContinuousCommand,
-    )
-    env = sapientino_dict(agents_conf=(agent_conf,))
-    rollout(env)
+def test_seed():
+    """Test that reset seeds the random number generator."""
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    env = sapientino_dict((agent_conf,))
+    env.reset(seed=0)
+    first = env.rng.random(3)
+    env.reset(seed=0)
+    assert np.array_equal(env.rng.random(3), first)
 
 
-def test_different_action_spaces():
-    """Test agents with different action spaces."""
+def test_tuple_observations():
+    """Test that the tuple observations match the dictionary ones."""
     agents_conf = (
-        SapientinoAgentConfiguration(
-            initial_position=(3, 3),
-            commands=actions.GridCommand,
-        ),
+        SapientinoAgentConfiguration(initial_position=(3, 3)),
         SapientinoAgentConfiguration(
             initial_position=(3, 4),
             commands=actions.DifferentialGridCommand,
+            angle_parts=8,
         ),
+    )
+    dict_env = sapientino_dict(agents_conf)
+    tuple_env = SapientinoTuple(sapientino_dict(agents_conf).configuration)
+    rollout(tuple_env)
+    dict_env.reset()
+    tuple_env.reset()
+    dict_env.action_space.seed(0)
+    for _ in range(NB_ROLLOUT_STEPS):
+        action = dict_env.action_space.sample()
+        dict_obs = dict_env.step(action)[0]
+        tuple_obs = tuple_env.step(action)[0]
+        assert tuple_env.observation_space.contains(tuple_obs)
+        for d, t in zip(dict_obs, tuple_obs):
+            assert t._asdict() == {k: d[k] for k in t._fields}
+
+
+def test_invalid_actions():
+    """Test that steps resolve actions as the command classes do."""
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    env = sapientino_dict((agent_conf,))
+    env.reset()
+    env.step((1.0,))
+    assert env.state.last_commands == [actions.GridCommand.UP]
+    for action in (-1, env.action_space[0].n):
+        with pytest.raises(ValueError, match="not a valid GridCommand"):
+            env.step((action,))
+
+
+def test_step_k():
+    """Test that step_k is equivalent to repeated steps."""
+    agents_conf = (
+        SapientinoAgentConfiguration(initial_position=(3, 3)),
         SapientinoAgentConfiguration(
-            initial_position=(3, 2),
-            commands=actions.ContinuousCommand,
+            initial_position=(3, 4), commands=actions.ContinuousCommand
         ),
     )
-    env = sapientino_dict(agents_conf)
+    env = Sapientino(SapientinoConfiguration(agents_conf, grid_map=_load_map()))
+    batch_env = Sapientino(SapientinoConfiguration(agents_conf, grid_map=_load_map()))
+    env.reset()
+    batch_env.reset()
+    env.action_space.seed(0)
+    batched_actions = np.array([env.action_space.sample() for _ in range(50)])
+    observations, rewards, terminated, truncated = batch_env.step_k(batched_actions)
+    assert len(observations) == len(rewards) == len(terminated) == len(truncated)
+    assert len(observations) == 50
+    for action, obs, reward in zip(batched_actions, observations, rewards):
+        expected_obs, expected_reward, *_ = env.step(action)
+        assert np.isclose(reward, expected_reward)
+        assert batch_env.observation_space.contains(obs)
+        for o, e in zip(obs, expected_obs):
+            assert all(np.array_equal(o[key], e[key]) for key in e)
+
+
+def test_rollout_resets():
+    """Test that rollouts continue after the episode ends."""
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    env = gym.wrappers.TimeLimit(sapientino_dict((agent_conf,)), 5)
+    rollout(env)
+
+
+def test_single_agent():
+    """Test a simplified observation space for one agent only."""
+    env = sapientino_dict(
+        agents_conf=(SapientinoAgentConfiguration(initial_position=(3, 3)),)
+    )
+    env = SingleAgentWrapper(env)
+    assert isinstance(env.action_space, spaces.Discrete)
+    assert isinstance(env.observation_space, spaces.Dict)
     rollout(env)
 
 
+class _RecordActions(gym.Wrapper):
+    """Keep the actions received by each step."""
+
+    def __init__(self, env: gym.Env):
+        """Initialize the wrapper."""
+        super().__init__(env)
+        self.actions: list = []
+
+    def step(self, action):
+        """Record the action and do a step."""
+        self.actions.append(action)
+        return super().step(action)
+
+
+def test_single_agent_actions():
+    """Test that stored actions are not changed by later steps."""
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    recorder = _RecordActions(sapientino_dict((agent_conf,)))
+    env = SingleAgentWrapper(recorder)
+    env.reset()
+    env.step(1)
+    env.step(2)
+    assert recorder.actions == [[1], [2]]
+
+
+def test_discrete_default():
+    """Test the discrete action space (default); rollouts are in test_rollout."""
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    assert agent_conf.commands == actions.GridCommand, "Wrong default"
+
+
 def test_discrete_features():
     """Test discrete features."""
     agent_conf = SapientinoAgentConfiguration(
@@ -196,6 +377,12 @@ def test_discrete_features():
     assert isinstance(env.observation_space[0], spaces.MultiDiscrete)
     rollout(env)
 
+    # Arrays are shared between equal observations, so they are read-only
+    obs = env.observation(env.last_dict_observation)[0]
+    assert obs is env.observation(env.last_dict_observation)[0]
+    assert not obs.flags.writeable
+    assert obs.dtype == env.observation_space[0].dtype
+
 
 def test_differential_features():
     """Test differential features."""
@@ -230,6 +417,39 @@ def test_continuous_features():
     assert isinstance(env.observation_space[0], spaces.Box)
     rollout(env)
 
+    # A second environment gets an equal space, but not the same object
+    other = observations.UseFeatures(
+        env=sapientino_dict(agents_conf=(agent_conf,)),
+        features=[observations.ContinuousFeatures],
+    )
+    assert other.observation_space[0] == env.observation_space[0]
+    assert other.observation_space[0] is not env.observation_space[0]
+
+
+def test_packed_features():
+    """Test discrete features packed into one integer."""
+    agent_conf = SapientinoAgentConfiguration(
+        initial_position=(3, 3),
+        commands=actions.DifferentialGridCommand,
+        angle_parts=8,
+    )
+    env = sapientino_dict(agents_conf=(agent_conf,))
+    env = observations.UseFeatures(
+        env=env,
+        features=[observations.PackedFeatures],
+    )
+    assert isinstance(env.observation_space, spaces.Tuple)
+    assert isinstance(env.observation_space[0], spaces.Discrete)
+    rollout(env)
+
+    # Fields can be read back with masks
+    packed = env.observation(env.last_dict_observation)[0]
+    dict_obs = env.last_dict_observation[0]
+    for field, shift in env.features[0]._shifts:
+        n = env.unwrapped.observation_space[0][field].n
+        mask = (1 << (int(n) - 1).bit_length()) - 1
+        assert (packed >> shift) & mask == dict_obs[field]
+
 
 def test_all_features():
     """Test all features."""
@@ -261,9 +481,84 @@ def test_all_features():
     assert isinstance(env.observation_space[0], spaces.MultiDiscrete)
     assert isinstance(env.observation_space[1], spaces.MultiDiscrete)
     assert isinstance(env.observation_space[2], spaces.Box)
+    assert all(
+        space is f.observation_space
+        for space, f in zip(env.observation_space, env.features)
+    )
     rollout(env)
 
 
+def test_ray_worker():
+    """Test the worker wrapped by the Ray actors."""
+    pytest.importorskip("ray")
+    from gym_sapientino import ray_env
+    agent_conf = SapientinoAgentConfiguration(initial_position=(3, 3))
+    worker = ray_env.SapientinoWorker(sapientino_dict((agent_conf,)).configuration)
+    observation_space = worker.env.observation_space
+    obs, _ = worker.reset(seed=0)
+    assert observation_space.contains(obs)
+    observations, rewards, terminated, truncated = worker.step((1,), n_steps=5)
+    assert len(observations) == len(rewards) == 5
+    assert all(observation_space.contains(o) for o in observations)
+    assert not terminated and not truncated
+    obs, reward, terminated, truncated = worker.step_k((1,), k=5)
+    assert observation_space.contains(obs)
+    assert np.isclose(reward, 5 * worker.env.configuration.reward_per_step)
+    assert not terminated and not truncated
+    worker.close()
+
+
+def test_combine_boxes():
+    """Test the combination of unidimensional boxes."""
+    a = spaces.Box(0.0, 1.0, shape=[1])
+    b = spaces.Box(-1.0, 1.0, shape=[2])
+    combined = utils.combine_boxes(a, b)
+    assert np.array_equal(combined.low, [0.0, -1.0, -1.0])
+    assert np.array_equal(combined.high, [1.0, 1.0, 1.0])
+    # A new space each time, with its own random generator
+    assert utils.combine_boxes(a, b) is not combined
+
+
+def test_set_to_zero_if_small():
+    """Test that small numbers are zeroed as with np.isclose."""
+    for x in (0.0, 1e-9, -1e-8, 2e-8, -0.5, 1.0):
+        expected = 0.0 if np.isclose(x, 0.0) else x
+        assert utils.set_to_zero_if_small(x) == expected
+
+
+def test_encode_decode():
+    """Test the encoding of discrete observations in one number."""
+    sizes = [3, 4, 2, 5]
+    observations = np.array(list(itertools.product(*map(range, sizes))))
+    codes = np.asarray(utils.encode(observations, sizes))
+    assert sorted(codes.tolist()) == list(range(len(observations)))
+    assert np.array_equal(utils.decode(codes, sizes), observations)
+    # Array sizes select the compiled decoder, when numba is installed
+    array_sizes = np.asarray(sizes)
+    for code, obs in zip(codes, observations):
+        assert utils.encode(obs, sizes) == utils.encode(obs.tolist(), sizes) == code
+        assert utils.decode(int(code), sizes) == obs.tolist()
+        assert utils.decode(int(code), array_sizes) == obs.tolist()
+    with pytest.raises(ValueError):
+        utils.encode([0, 0], sizes)
+
+
+def test_numba_codec():
+    """Test that numba is only imported by the first encoding of an array."""
+    pytest.importorskip("numba")
+    code = (
+        "import sys, numpy, gym_sapientino.utils as u; "
+        "assert 'numba' not in sys.modules; "
+        "assert u.encode(numpy.array([1, 2]), [3, 4]) == 7; "
+        "assert 'numba' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)  # nosec
+
+
+# Forward motion (dx, dy) for each multiple of 45 degrees
+_FORWARD_45 = ((1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1))
+
+
 class Differential45Command(Command):
     """Command with rotations fo 45 degrees."""
 
@@ -275,21 +570,17 @@ class Differential45Command(Command):
 
     def step(self, robot: Robot) -> Robot:
         """Move a robot according to the command."""
-        sin, cos = robot.direction.sincos()
-        dx = 1 if cos > 0.1 else -1 if cos < -0.1 else 0
-        dy = -1 if sin > 0.1 else 1 if sin < -0.1 else 0
-        x, y = robot.x, robot.y
-        direction = robot.direction
-        if self == self.LEFT:
-            direction = direction.rotate(45.0)
-        elif self == self.RIGHT:
-            direction = direction.rotate(-45.0)
-        elif self == self.FORWARD:
-            x += dx
-            y += dy
-
-        r = Robot(robot.config, x, y, robot.velocity, direction.theta, robot.id)
-
+        # Rotating in place cannot hit a wall; only forward moves are checked
+        if self == self.LEFT or self == self.RIGHT:
+            delta = 45.0 if self == self.LEFT else -45.0
+            theta = robot.direction.rotate(delta).theta
+            x, y = robot.x, robot.y
+            return Robot(robot.config, x, y, robot.velocity, theta, robot.id)
+        if self != self.FORWARD:
+            return robot
+
+        dx, dy = _FORWARD_45[int(round(robot.direction.theta / 45.0)) & 7]
+        r = robot.move(robot.x + dx, robot.y + dy)
         return r if not r._on_wall() else robot
 
     @staticmethod
@@ -319,3 +610,74 @@ def test_45_deg():
     )
     env = sapientino_dict(agents_conf)
     rollout(env)
+
+
+def test_sync_vector_env():
+    """Test a rollout of Sapientino environments in a gymnasium vector env."""
+    agents_conf = (
+        SapientinoAgentConfiguration(initial_position=(3, 3)),
+        SapientinoAgentConfiguration(
+            initial_position=(3, 4), commands=actions.ContinuousCommand
+        ),
+    )
+    env = gym.vector.SyncVectorEnv(
+        [lambda: sapientino_dict(agents_conf) for _ in range(4)]
+    )
+    rollout(env)
+    env.close()
+
+
+def test_async_vector_env():
+    """Test multi-agent environments stepped in worker processes."""
+    agents_conf = ROLLOUT_CASES["different_action_spaces"]
+    env = gym.vector.AsyncVectorEnv(
+        [lambda: sapientino_dict(agents_conf) for _ in range(2)],
+        shared_memory=True,
+    )
+    rollout(env)
+    env.close()
+
+
+def test_vector_env():
+    """Test that the vectorized environment behaves as independent environments."""
+    num_envs = 4
+    agents_conf = (
+        SapientinoAgentConfiguration(initial_position=(3, 3)),
+        SapientinoAgentConfiguration(
+            initial_position=(3, 4), commands=actions.DifferentialGridCommand
+        ),
+        SapientinoAgentConfiguration(
+            initial_position=(3, 2), commands=actions.ContinuousCommand
+        ),
+        SapientinoAgentConfiguration(
+            initial_position=(2, 2), commands=Differential45Command, angle_parts=8
+        ),
+    )
+
+    def configuration():
+        return SapientinoConfiguration(
+            agents_conf, grid_map=_load_map(), reward_per_step=-0.01
+        )
+
+    vector_env = VectorSapientino(configuration(), num_envs)
+    envs = [Sapientino(configuration()) for _ in range(num_envs)]
+    vector_env.action_space.seed(0)
+
+    def check(vector_obs, single_obs):
+        assert vector_env.observation_space.contains(vector_obs)
+        for i in range(len(agents_conf)):
+            for key, values in vector_obs[i].items():
+                expected = [o[i][key] for o in single_obs]
+                assert np.allclose(np.reshape(expected, values.shape), values), key
+
+    vector_obs, _ = vector_env.reset()
+    check(vector_obs, [env.reset()[0] for env in envs])
+    for _ in range(5 * NB_ROLLOUT_STEPS):
+        batched_actions = vector_env.action_space.sample()
+        vector_obs, rewards, terminated, truncated, _ = vector_env.step(batched_actions)
+        results = [
+            env.step([a[j] for a in batched_actions]) for j, env in enumerate(envs)
+        ]
+        check(vector_obs, [r[0] for r in results])
+        assert np.allclose(rewards, [r[1] for r in results])
+        assert not terminated.any() and not truncated.any()